@@ -3,33 +3,53 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import hashlib
 import json
 import os
 import sys
-from typing import Dict, List
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from llm.llm_client import LLMClient
+from llm.llm_client import DEFAULT_BASE_URL, LLMClient, supports_stateful
 from memory.context_memory import ContextMemory
+from memory.embedder import Embedder
+from memory.embedding_cache import EMBEDDING_CACHE
 from memory.memory_router import MemoryRouter
 from memory.profile_memory import ProfileMemory
 from memory.retrieval_memory import RetrievalMemory
+from memory.semantic_cache import SemanticCache
 from prompt.prompt_builder import PromptBuilder
 
 
-def _log_turn(turn_index: int, user_text: str, assistant_text: str) -> None:
-    """Print a formatted turn to the console."""
-    print(f"\nTurn {turn_index}")
+def _log_turn(
+    turn_index: int,
+    user_text: str,
+    assistant_text: str,
+    label: str = "",
+) -> None:
+    """Print a formatted turn to the console, prefixed by an optional run label."""
+    print(f"\n{label}Turn {turn_index}")
     print(f"User: {user_text}")
     print(f"Assistant: {assistant_text}")
 
 
-def _build_messages_no_memory(query: str) -> List[Dict[str, str]]:
+def _build_messages_no_memory(
+    builder: PromptBuilder,
+    query: str,
+) -> List[Dict[str, str]]:
     """Build messages without any memory."""
-    return [{"role": "user", "content": query}]
+    return builder.build_messages(
+        context_memories=[],
+        retrieved_memories=[],
+        profile_prompt="",
+        user_query=query,
+    )
 
 
 def _build_messages_with_context(
@@ -70,19 +90,113 @@ def _build_messages_hierarchical(
     """Build messages using combined memories."""
     memories = router.collect_memories(query)
     return builder.build_messages(
-        context_memories=memories["context"],
-        retrieved_memories=memories["retrieval"],
-        profile_prompt=memories["profile"],
+        context_memories=memories.context,
+        retrieved_memories=memories.retrieval,
+        profile_prompt=memories.profile,
         user_query=query,
     )
 
 
-def run_experiment(mode: str, user_queries: List[str]) -> List[str]:
+# Identical for every mode and turn, so it forms a cacheable prompt prefix
+# without favouring any memory design.
+_STATIC_SYSTEM_PROMPT = "You are a helpful assistant."
+
+_SUMMARY_SYSTEM_PROMPT = "Summarize the conversation below."
+
+# Summaries keyed by SHA-256 of the summarizer input, shared across runs.
+# Bounded LRU; summarizers run in worker threads, hence the lock.
+_SUMMARY_CACHE_MAX_ENTRIES = 256
+_SUMMARY_CACHE: "OrderedDict[bytes, str]" = OrderedDict()
+_SUMMARY_CACHE_LOCK = threading.Lock()
+
+
+def _make_summarizer(llm: LLMClient) -> Callable[[str], str]:
+    """Create a cached summarizer for context memory backed by the LLM."""
+
+    def summarize(text: str) -> str:
+        key = hashlib.sha256(text.encode("utf-8", "surrogatepass")).digest()
+        with _SUMMARY_CACHE_LOCK:
+            cached = _SUMMARY_CACHE.get(key)
+            if cached is not None:
+                _SUMMARY_CACHE.move_to_end(key)
+                return cached
+        summary = llm.generate(
+            [
+                {"role": "system", "content": _SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": text},
+            ]
+        )
+        if summary.startswith("Error:"):
+            # Keep the raw text rather than losing the evicted turn.
+            return text
+        with _SUMMARY_CACHE_LOCK:
+            _SUMMARY_CACHE[key] = summary
+            if len(_SUMMARY_CACHE) > _SUMMARY_CACHE_MAX_ENTRIES:
+                _SUMMARY_CACHE.popitem(last=False)
+        return summary
+
+    return summarize
+
+
+def run_experiment(
+    mode: str,
+    user_queries: List[str],
+    summarize_context: bool = False,
+    stateful: bool = False,
+    raw_http: bool = False,
+) -> List[str]:
     """Run a multi-turn simulation for a given memory mode."""
-    llm = LLMClient()
-    builder = PromptBuilder()
-    context_memory = ContextMemory(max_turns=4)
-    retrieval_memory = RetrievalMemory()
+    return asyncio.run(
+        run_experiment_async(
+            mode,
+            user_queries,
+            summarize_context=summarize_context,
+            stateful=stateful,
+            raw_http=raw_http,
+        )
+    )
+
+
+async def run_experiment_async(
+    mode: str,
+    user_queries: List[str],
+    label: str = "",
+    summarize_context: bool = False,
+    stateful: bool = False,
+    embedder: Optional[Embedder] = None,
+    response_cache: Optional[SemanticCache] = None,
+    raw_http: bool = False,
+) -> List[str]:
+    """
+    Run a multi-turn simulation for a given memory mode.
+
+    Turns within a conversation stay sequential; only the LLM calls yield to
+    the event loop, so independent runs can overlap their network waits.
+    With ``summarize_context`` enabled, turns evicted from the context window
+    are folded into an LLM-written summary instead of being dropped.
+    With ``stateful`` enabled, context mode keeps the conversation on the
+    server and sends only the new query after the first turn. The server then
+    sees every turn, so the 4-turn window no longer applies; the local window
+    is still built as the fallback when the chain is lost, but without a
+    summary, since nothing would send it.
+    ``embedder`` and ``response_cache`` may be shared between runs.
+    """
+    # Only the context mode's prompt is a pure conversation transcript that the
+    # server can extend; other modes inject per-turn system messages.
+    chained = stateful and mode == "context"
+    llm = LLMClient(
+        stateful=chained,
+        cache=response_cache,
+        raw_http=raw_http,
+    )
+    builder = PromptBuilder(static_system=_STATIC_SYSTEM_PROMPT)
+    context_memory = ContextMemory(
+        max_turns=4,
+        summarizer=(
+            _make_summarizer(llm) if summarize_context and not chained else None
+        ),
+    )
+    retrieval_memory = RetrievalMemory(embedder=embedder)
     profile_memory = ProfileMemory()
     router = MemoryRouter(
         context_memory=context_memory,
@@ -92,34 +206,88 @@ def run_experiment(mode: str, user_queries: List[str]) -> List[str]:
     )
 
     assistant_responses: List[str] = []
-    for index, query in enumerate(user_queries, start=1):
-        if mode == "no_memory":
-            messages = _build_messages_no_memory(query)
-        elif mode == "context":
-            messages = _build_messages_with_context(builder, context_memory, query)
-        elif mode == "retrieval":
-            messages = _build_messages_with_retrieval(builder, retrieval_memory, query)
-        elif mode == "hierarchical":
-            messages = _build_messages_hierarchical(builder, router, query)
-        else:
-            raise ValueError(f"Unsupported mode: {mode}")
-
-        assistant_text = llm.generate(messages)
-        _log_turn(index, query, assistant_text)
-        assistant_responses.append(assistant_text)
-
-        # Memory isolation: update only the components relevant to the active mode.
-        if mode == "context":
-            context_memory.add_turn(query, assistant_text)
-        elif mode == "retrieval":
-            retrieval_memory.add_memory(f"User: {query}\nAssistant: {assistant_text}")
-        elif mode == "hierarchical":
-            context_memory.add_turn(query, assistant_text)
-            retrieval_memory.add_memory(f"User: {query}\nAssistant: {assistant_text}")
-            profile_memory.update_from_text(query)
+    try:
+        for index, query in enumerate(user_queries, start=1):
+            if mode == "no_memory":
+                messages = _build_messages_no_memory(builder, query)
+            elif mode == "context":
+                messages = _build_messages_with_context(builder, context_memory, query)
+            elif mode == "retrieval":
+                messages = _build_messages_with_retrieval(
+                    builder, retrieval_memory, query
+                )
+            elif mode == "hierarchical":
+                messages = _build_messages_hierarchical(builder, router, query)
+            else:
+                raise ValueError(f"Unsupported mode: {mode}")
+
+            assistant_text = await llm.agenerate(messages)
+            # The SDK has serialized the request by now, so the containers can be
+            # reused.
+            builder.release(messages)
+            _log_turn(index, query, assistant_text, label)
+            assistant_responses.append(assistant_text)
+
+            # Memories are only read by later turns; after the last one an update
+            # could still cost a summarizer call for nothing.
+            if index == len(user_queries):
+                break
+
+            # Memory isolation: update only the components relevant to the active
+            # mode. Context updates may call the summarizer, so keep them off the
+            # event loop.
+            if mode == "context":
+                await asyncio.to_thread(context_memory.add_turn, query, assistant_text)
+            elif mode == "retrieval":
+                retrieval_memory.add_memory(
+                    f"User: {query}\nAssistant: {assistant_text}"
+                )
+            elif mode == "hierarchical":
+                await asyncio.to_thread(context_memory.add_turn, query, assistant_text)
+                retrieval_memory.add_memory(
+                    f"User: {query}\nAssistant: {assistant_text}"
+                )
+                profile_memory.update_from_text(query)
+    finally:
+        # The raw httpx clients are opened lazily; release them with the run.
+        await llm.aclose()
     return assistant_responses
 
 
+async def _run_repeats(
+    mode: str,
+    user_queries: List[str],
+    repeat: int,
+    max_concurrency: int,
+    summarize_context: bool = False,
+    stateful: bool = False,
+    embedder: Optional[Embedder] = None,
+    response_cache: Optional[SemanticCache] = None,
+    raw_http: bool = False,
+) -> List[List[str]]:
+    """Run independent repeats concurrently, at most ``max_concurrency`` at a time."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    # Load the embedding model once for every repeat.
+    if embedder is None:
+        embedder = Embedder()
+
+    async def _run_one(repeat_index: int) -> List[str]:
+        async with semaphore:
+            print(f"Running experiment {repeat_index + 1}/{repeat} in mode: {mode}")
+            return await run_experiment_async(
+                mode,
+                user_queries,
+                label=f"[Run {repeat_index + 1}] ",
+                summarize_context=summarize_context,
+                stateful=stateful,
+                embedder=embedder,
+                response_cache=response_cache,
+                raw_http=raw_http,
+            )
+
+    return await asyncio.gather(*[_run_one(index) for index in range(repeat)])
+
+
 def _scenario_short_preference() -> List[str]:
     """Create a short preference scenario."""
     return [
@@ -216,17 +384,83 @@ def main() -> None:
         default=5,
         help="Number of repeats for evaluation.",
     )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=5,
+        help="Maximum number of repeats running concurrently.",
+    )
+    parser.add_argument(
+        "--summarize-context",
+        action="store_true",
+        help="Summarize turns evicted from the context window instead of dropping them.",
+    )
+    parser.add_argument(
+        "--stateful",
+        action="store_true",
+        help=(
+            "In context mode, keep history server-side via the Responses API "
+            "previous_response_id instead of resending it each turn. The server "
+            "keeps every turn, so context mode no longer measures the 4-turn "
+            "window, and --summarize-context has no effect there. Requires a "
+            "server that stores responses; OpenRouter does not."
+        ),
+    )
+    parser.add_argument(
+        "--semantic-cache",
+        action="store_true",
+        help=(
+            "Reuse LLM responses for identical prompts (and, with a real "
+            "embedding model, near-identical queries). Concurrent identical "
+            "requests share one call, so repeats mostly replay the first run's "
+            "answers."
+        ),
+    )
+    parser.add_argument(
+        "--embedding-fp16",
+        action="store_true",
+        help="Run the embedding model in half precision when a CUDA GPU is used.",
+    )
+    parser.add_argument(
+        "--raw-http",
+        action="store_true",
+        help="Send chat requests as cached, pre-encoded JSON over httpx.",
+    )
     args = parser.parse_args()
+    if args.max_concurrency <= 0:
+        parser.error("--max-concurrency must be a positive integer.")
+    if args.stateful and not supports_stateful(DEFAULT_BASE_URL):
+        parser.error(
+            f"--stateful needs server-side response storage, which {DEFAULT_BASE_URL} "
+            "does not provide."
+        )
     mode = args.mode
     if args.scenario == "long_preference":
         user_queries = _scenario_long_preference()
     else:
         user_queries = _scenario_short_preference()
 
+    embedder = Embedder(use_fp16=args.embedding_fp16)
+    response_cache: Optional[SemanticCache] = None
+    if args.semantic_cache:
+        response_cache = SemanticCache(embedder=embedder)
+
+    all_responses = asyncio.run(
+        _run_repeats(
+            mode,
+            user_queries,
+            args.repeat,
+            args.max_concurrency,
+            summarize_context=args.summarize_context,
+            stateful=args.stateful,
+            embedder=embedder,
+            response_cache=response_cache,
+            raw_http=args.raw_http,
+        )
+    )
+
     results: List[Dict[str, bool]] = []
-    for repeat_index in range(args.repeat):
-        print(f"Running experiment {repeat_index + 1}/{args.repeat} in mode: {mode}")
-        assistant_responses = run_experiment(mode, user_queries)
+    for assistant_responses in all_responses:
         # Evaluate last two turns only; assume fixed scenario ordering.
         preference_reply = assistant_responses[-2] if len(assistant_responses) >= 2 else ""
         summary_reply = assistant_responses[-1] if len(assistant_responses) >= 1 else ""
@@ -263,6 +497,17 @@ def main() -> None:
         json.dump(summary, f, indent=2)
 
     print(f"\nResults saved to: {output_path}")
+    print(
+        f"Embedding cache: {EMBEDDING_CACHE.hits} hits, "
+        f"{EMBEDDING_CACHE.misses} misses"
+    )
+    if response_cache is not None:
+        print(
+            f"Response cache: {response_cache.exact_hits} exact hits, "
+            f"{response_cache.inflight_hits} shared in-flight, "
+            f"{response_cache.semantic_hits} semantic hits, "
+            f"{response_cache.misses} misses"
+        )
 
 
 if __name__ == "__main__":
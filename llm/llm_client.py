@@ -2,17 +2,56 @@
 
 from __future__ import annotations
 
+import asyncio
+import email.utils
+import json
 import os
-from typing import Any, Dict, List
+import random
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 try:
-    from openai import OpenAI
+    from openai import AsyncOpenAI, BadRequestError, NotFoundError, OpenAI
 except ImportError as exc:  # pragma: no cover
+    AsyncOpenAI = None  # type: ignore
     OpenAI = None  # type: ignore
+    BadRequestError = NotFoundError = Exception  # type: ignore
     _IMPORT_ERROR = exc
 else:
     _IMPORT_ERROR = None
 
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if TYPE_CHECKING:
+    from memory.semantic_cache import SemanticCache
+
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Endpoints known to store responses for ``previous_response_id`` chaining.
+# OpenRouter's Responses API is stateless, so it is deliberately absent.
+_STATEFUL_BASE_URLS = frozenset({"https://api.openai.com/v1"})
+
+# Retry policy for the raw httpx path, mirroring the openai SDK defaults.
+_RAW_MAX_RETRIES = 2
+_RAW_INITIAL_RETRY_DELAY = 0.5
+_RAW_MAX_RETRY_DELAY = 8.0
+_RAW_MAX_RETRY_AFTER = 60.0
+_RAW_TIMEOUT = httpx.Timeout(600.0, connect=5.0) if httpx is not None else None
+
+
+def supports_stateful(base_url: str) -> bool:
+    """Return whether ``base_url`` is known to keep server-side response state."""
+    return base_url.rstrip("/") in _STATEFUL_BASE_URLS
+
 
 class LLMClient:
     """Minimal OpenRouter LLM client using an OpenAI-compatible SDK."""
@@ -20,8 +59,12 @@ class LLMClient:
     def __init__(
         self,
         model: str = "xiaomi/mimo-v2-flash:free",
-        base_url: str = "https://openrouter.ai/api/v1",
+        base_url: str = DEFAULT_BASE_URL,
         api_key_env: str = "OPENROUTER_API_KEY",
+        stateful: bool = False,
+        cache: Optional["SemanticCache"] = None,
+        raw_http: bool = False,
+        max_cached_fragments: int = 1024,
     ) -> None:
         """
         Initialize the LLM client.
@@ -30,11 +73,32 @@ class LLMClient:
             model: OpenRouter model identifier.
             base_url: OpenRouter API base URL.
             api_key_env: Environment variable name storing the API key.
+            stateful: Use the Responses API and chain calls through
+                ``previous_response_id``, so after the first call only the
+                newest message is sent and the server keeps the history.
+                The server then sees every earlier turn, not a caller-side
+                window. Only allowed for base URLs in ``supports_stateful``;
+                elsewhere the id is ignored or rejected.
+            cache: Optional response cache consulted before each request.
+                Bypassed in stateful mode, where a skipped call would leave
+                the server-side history incomplete.
+            raw_http: Post chat completions as pre-encoded JSON over httpx,
+                skipping SDK request validation. Each distinct message is
+                serialized once (with orjson when installed) and reused
+                while it stays in the prompt prefix. Ignored when stateful.
+                Timeouts, 408/409/429/5xx responses and connection errors
+                are retried with backoff like the SDK does.
+            max_cached_fragments: Number of encoded messages kept for reuse.
         """
         if OpenAI is None:
             raise ImportError(
                 "openai SDK is required. Please install it via requirements.txt."
             ) from _IMPORT_ERROR
+        if stateful and not supports_stateful(base_url):
+            raise ValueError(
+                f"stateful=True needs a server that stores responses; {base_url} "
+                "is not known to support previous_response_id."
+            )
 
         api_key = os.getenv(api_key_env)
         if not api_key:
@@ -46,7 +110,29 @@ class LLMClient:
             base_url=base_url,
             api_key=api_key,
         )
+        self._aclient = AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+        )
         self._model = model
+        self._stateful = stateful
+        self._last_response_id: Optional[str] = None
+        self._cache = cache if not stateful else None
+
+        self._raw_http = raw_http and not stateful
+        if self._raw_http and httpx is None:
+            raise ImportError("httpx is required for raw_http=True.")
+        self._base_url = base_url
+        self._headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        }
+        # Created on first use and reused until ``close``/``aclose``.
+        self._http: Optional["httpx.Client"] = None
+        self._ahttp: Optional["httpx.AsyncClient"] = None
+        self._model_json = _dumps(model)
+        self._max_cached_fragments = max_cached_fragments
+        self._fragments: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
 
     def generate(self, messages: List[Dict[str, Any]]) -> str:
         """
@@ -59,10 +145,260 @@ class LLMClient:
             Generated assistant response as a string.
         """
         try:
-            response = self._client.chat.completions.create(
-                model=self._model,
-                messages=messages,
+            if self._cache is None:
+                return self._request(messages)
+            cached = self._cache.lookup(self._model, messages)
+            if cached is not None:
+                return cached
+            text = self._request(messages)
+            if text:
+                self._cache.store(self._model, messages, text)
+            return text
+        except Exception as exc:
+            return f"Error: {exc}"
+
+    async def agenerate(self, messages: List[Dict[str, Any]]) -> str:
+        """
+        Generate a response using chat completion without blocking the event loop.
+
+        With a cache, concurrent identical requests share a single API call.
+
+        Args:
+            messages: List of chat messages following OpenAI format.
+
+        Returns:
+            Generated assistant response as a string.
+        """
+        try:
+            if self._cache is None:
+                return await self._arequest(messages)
+            return await self._cache.aresolve(
+                self._model,
+                messages,
+                lambda: self._arequest(messages),
             )
-            return response.choices[0].message.content or ""
         except Exception as exc:
             return f"Error: {exc}"
+
+    def _request(self, messages: List[Dict[str, Any]]) -> str:
+        """Send one request and return the response text; raises on failure."""
+        if self._stateful:
+            return self._generate_stateful(messages)
+        if self._raw_http:
+            return self._post_raw(self._encode_body(messages))
+        response = self._client.chat.completions.create(
+            model=self._model,
+            messages=messages,
+        )
+        return response.choices[0].message.content or ""
+
+    async def _arequest(self, messages: List[Dict[str, Any]]) -> str:
+        """Async variant of ``_request``."""
+        if self._stateful:
+            return await self._agenerate_stateful(messages)
+        if self._raw_http:
+            return await self._apost_raw(self._encode_body(messages))
+        response = await self._aclient.chat.completions.create(
+            model=self._model,
+            messages=messages,
+        )
+        return response.choices[0].message.content or ""
+
+    def close(self) -> None:
+        """Close the underlying HTTP connections."""
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+        self._client.close()
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connections, including the async ones."""
+        if self._ahttp is not None:
+            await self._ahttp.aclose()
+            self._ahttp = None
+        await self._aclient.close()
+        self.close()
+
+    def _post_raw(self, body: bytes) -> str:
+        """POST a chat completion body over httpx, retrying like the SDK."""
+        if self._http is None:
+            self._http = httpx.Client(
+                base_url=self._base_url,
+                headers=self._headers,
+                timeout=_RAW_TIMEOUT,
+            )
+        for attempt in range(_RAW_MAX_RETRIES + 1):
+            retries_left = attempt < _RAW_MAX_RETRIES
+            try:
+                response = self._http.post("chat/completions", content=body)
+            except httpx.TransportError:
+                if not retries_left:
+                    raise
+                time.sleep(_retry_delay(attempt, None))
+                continue
+            if retries_left and _should_retry(response):
+                response.close()
+                time.sleep(_retry_delay(attempt, response))
+                continue
+            return _parse_chat_response(response)
+        raise AssertionError("unreachable")
+
+    async def _apost_raw(self, body: bytes) -> str:
+        """Async variant of ``_post_raw``."""
+        if self._ahttp is None:
+            self._ahttp = httpx.AsyncClient(
+                base_url=self._base_url,
+                headers=self._headers,
+                timeout=_RAW_TIMEOUT,
+            )
+        for attempt in range(_RAW_MAX_RETRIES + 1):
+            retries_left = attempt < _RAW_MAX_RETRIES
+            try:
+                response = await self._ahttp.post("chat/completions", content=body)
+            except httpx.TransportError:
+                if not retries_left:
+                    raise
+                await asyncio.sleep(_retry_delay(attempt, None))
+                continue
+            if retries_left and _should_retry(response):
+                await response.aclose()
+                await asyncio.sleep(_retry_delay(attempt, response))
+                continue
+            return _parse_chat_response(response)
+        raise AssertionError("unreachable")
+
+    def _encode_body(self, messages: List[Dict[str, Any]]) -> bytes:
+        """Build the chat completion JSON body from per-message encoded fragments."""
+        fragments = []
+        for message in messages:
+            content = message.get("content")
+            if len(message) != 2 or not isinstance(content, str):
+                fragments.append(_dumps(message))
+                continue
+            key = (message["role"], content)
+            fragment = self._fragments.get(key)
+            if fragment is None:
+                fragment = _dumps({"role": key[0], "content": key[1]})
+                self._fragments[key] = fragment
+                if len(self._fragments) > self._max_cached_fragments:
+                    self._fragments.popitem(last=False)
+            else:
+                self._fragments.move_to_end(key)
+            fragments.append(fragment)
+        return b"".join(
+            [b'{"model":', self._model_json, b',"messages":[', b",".join(fragments), b"]}"]
+        )
+
+    def _generate_stateful(self, messages: List[Dict[str, Any]]) -> str:
+        """Continue the server-side conversation, resending history if it is gone."""
+        if self._last_response_id is not None:
+            try:
+                response = self._client.responses.create(
+                    model=self._model,
+                    input=messages[-1:],
+                    previous_response_id=self._last_response_id,
+                )
+                return self._record_response(response)
+            except (BadRequestError, NotFoundError):
+                # Unknown or expired response id: fall back to the full history.
+                self._last_response_id = None
+        response = self._client.responses.create(model=self._model, input=messages)
+        return self._record_response(response)
+
+    async def _agenerate_stateful(self, messages: List[Dict[str, Any]]) -> str:
+        """Async variant of ``_generate_stateful``."""
+        if self._last_response_id is not None:
+            try:
+                response = await self._aclient.responses.create(
+                    model=self._model,
+                    input=messages[-1:],
+                    previous_response_id=self._last_response_id,
+                )
+                return self._record_response(response)
+            except (BadRequestError, NotFoundError):
+                # Unknown or expired response id: fall back to the full history.
+                self._last_response_id = None
+        response = await self._aclient.responses.create(model=self._model, input=messages)
+        return self._record_response(response)
+
+    def _record_response(self, response: Any) -> str:
+        """Remember the response id for chaining and return its text."""
+        self._last_response_id = response.id
+        return response.output_text or ""
+
+
+def _dumps(value: Any) -> bytes:
+    """Serialize to compact JSON bytes, preferring orjson."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _parse_retry_after(response: "httpx.Response") -> Optional[float]:
+    """Return the server-requested delay in seconds, if any."""
+    value = response.headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = response.headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        return None
+    return email.utils.mktime_tz(parsed) - time.time()
+
+
+def _should_retry(response: "httpx.Response") -> bool:
+    """Decide whether a raw response is worth retrying, as the SDK does."""
+    retry_after = _parse_retry_after(response)
+    if retry_after is not None and retry_after > _RAW_MAX_RETRY_AFTER:
+        return False
+    should_retry = response.headers.get("x-should-retry")
+    if should_retry == "true":
+        return True
+    if should_retry == "false":
+        return False
+    return response.status_code in (408, 409, 429) or response.status_code >= 500
+
+
+def _retry_delay(attempt: int, response: Optional["httpx.Response"]) -> float:
+    """Honor a short Retry-After, otherwise back off exponentially with jitter."""
+    if response is not None:
+        retry_after = _parse_retry_after(response)
+        if retry_after is not None and 0 < retry_after <= _RAW_MAX_RETRY_AFTER:
+            return retry_after
+    delay = min(_RAW_INITIAL_RETRY_DELAY * 2.0**attempt, _RAW_MAX_RETRY_DELAY)
+    return delay * (1.0 - 0.25 * random.random())
+
+
+def _parse_chat_response(response: "httpx.Response") -> str:
+    """Extract the assistant text from a raw chat completion response.
+
+    Providers such as OpenRouter may report failures as an ``error`` object,
+    sometimes with a 200 status; that object is surfaced in the exception.
+    """
+    try:
+        if orjson is not None:
+            payload = orjson.loads(response.content)
+        else:
+            payload = response.json()
+    except ValueError:
+        payload = None
+    error = payload.get("error") if isinstance(payload, dict) else None
+    if error is not None or response.is_error or not isinstance(payload, dict):
+        if isinstance(error, dict):
+            code = error.get("code", response.status_code)
+            detail = error.get("message") or str(error)
+        else:
+            code = response.status_code
+            detail = str(error) if error is not None else response.text[:200]
+            detail = detail or response.reason_phrase
+        raise RuntimeError(f"Provider error {code}: {detail}")
+    return payload["choices"][0]["message"].get("content") or ""
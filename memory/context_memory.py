@@ -3,23 +3,62 @@
 from __future__ import annotations
 
 from collections import deque
-from typing import Deque, Dict, List
+from itertools import chain
+from typing import Callable, Deque, Dict, Iterator, Optional
 
 
 class ContextMemory:
     """Maintain a sliding window of recent dialogue turns."""
 
-    def __init__(self, max_turns: int) -> None:
-        """Initialize memory with a maximum number of turns to retain."""
+    __slots__ = ("_max_turns", "_turns", "_summarizer", "_summary")
+
+    def __init__(
+        self,
+        max_turns: int,
+        summarizer: Optional[Callable[[str], str]] = None,
+    ) -> None:
+        """
+        Initialize memory with a maximum number of turns to retain.
+
+        Args:
+            max_turns: Number of verbatim turns kept in the window.
+            summarizer: Optional function condensing text into a summary. When
+                set, turns leaving the window are folded into a rolling
+                summary instead of being dropped.
+        """
         if max_turns <= 0:
             raise ValueError("max_turns must be a positive integer.")
         self._max_turns = max_turns
         self._turns: Deque[Dict[str, str]] = deque(maxlen=max_turns)
+        self._summarizer = summarizer
+        self._summary = ""
 
     def add_turn(self, user_text: str, assistant_text: str) -> None:
-        """Add a user/assistant turn to the memory."""
+        """Add a user/assistant turn, summarizing the evicted turn if configured."""
+        if self._summarizer is not None and len(self._turns) == self._max_turns:
+            self._summarize_turn(self._turns[0])
         self._turns.append({"user": user_text, "assistant": assistant_text})
 
-    def get_context(self) -> List[Dict[str, str]]:
-        """Return the stored turns in chronological order."""
-        return list(self._turns)
+    def get_context(self) -> Iterator[Dict[str, str]]:
+        """
+        Iterate the rolling summary, if any, then the stored turns in order.
+
+        The iterator is a single-pass view over the window, not a copy; consume
+        it before the next ``add_turn``.
+        """
+        if not self._summary:
+            return iter(self._turns)
+        summary_turn = {"role": "system", "content": self._summary_prompt()}
+        return chain((summary_turn,), self._turns)
+
+    def _summarize_turn(self, turn: Dict[str, str]) -> None:
+        """Fold an evicted turn into the rolling summary."""
+        parts = []
+        if self._summary:
+            parts.append(f"Summary so far:\n{self._summary}")
+        parts.append(f"User: {turn['user']}\nAssistant: {turn['assistant']}")
+        self._summary = self._summarizer("\n\n".join(parts))
+
+    def _summary_prompt(self) -> str:
+        """Format the rolling summary as a system message."""
+        return f"Summary of earlier conversation:\n{self._summary}"
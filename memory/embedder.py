@@ -0,0 +1,108 @@
+"""Embedding module turning texts into unit-length vectors."""
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+import numpy as np
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+from memory.embedding_cache import EMBEDDING_CACHE, EmbeddingCache
+
+_MODEL_NAME = "all-MiniLM-L6-v2"
+_MOCK_MODEL_NAME = "mock-char-64"
+
+
+class Embedder:
+    """Embed texts with sentence-transformers, or a mock fallback, via a shared cache."""
+
+    def __init__(
+        self,
+        cache: Optional[EmbeddingCache] = None,
+        device: Optional[str] = None,
+        use_fp16: bool = False,
+    ) -> None:
+        """
+        Load the embedding model.
+
+        Args:
+            cache: Embedding cache; defaults to the process-wide cache.
+            device: Torch device for the model; defaults to CUDA when available.
+            use_fp16: Run the model in half precision. Only applied on CUDA;
+                CPU inference stays float32.
+        """
+        self._cache = cache if cache is not None else EMBEDDING_CACHE
+        self._model: Optional[SentenceTransformer] = None
+        self._model_name = _MOCK_MODEL_NAME
+        if SentenceTransformer is not None:
+            if device is None:
+                device = _default_device()
+            self._model = SentenceTransformer(_MODEL_NAME, device=device)
+            self._model_name = _MODEL_NAME
+            if use_fp16 and device.startswith("cuda"):
+                self._model.half()
+                # fp16 vectors differ slightly, so keep them apart in the cache.
+                self._model_name = f"{_MODEL_NAME}:fp16"
+
+    @property
+    def model_name(self) -> str:
+        """Return the identifier of the active embedding model."""
+        return self._model_name
+
+    @property
+    def is_mock(self) -> bool:
+        """Whether the character-code fallback is in use instead of a real model."""
+        return self._model is None
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed one text as a unit-length float32 vector."""
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as unit-length float32 rows, encoding cache misses in one batch."""
+        embeddings: List[Optional[np.ndarray]] = [
+            self._cache.get(self._model_name, text) for text in texts
+        ]
+        missing = [idx for idx, emb in enumerate(embeddings) if emb is None]
+        if missing:
+            missing_texts = [texts[idx] for idx in missing]
+            if self._model is not None:
+                encoded = self._model.encode(
+                    missing_texts,
+                    batch_size=32,
+                    normalize_embeddings=True,
+                    convert_to_numpy=True,
+                )
+            else:
+                encoded = [_mock_embedding(text) for text in missing_texts]
+            for idx, text, embedding in zip(missing, missing_texts, encoded):
+                embeddings[idx] = self._cache.put(self._model_name, text, embedding)
+        return np.vstack(embeddings)
+
+
+def _default_device() -> str:
+    """Return "cuda" when torch sees a GPU, else "cpu"."""
+    if torch is not None and torch.cuda.is_available():
+        return "cuda"
+    return "cpu"
+
+
+def _mock_embedding(text: str, dim: int = 64) -> np.ndarray:
+    """Create a deterministic mock embedding from character codes."""
+    # UTF-32 gives one code point per character, matching ord(char) per index.
+    codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    buckets = np.arange(codes.size) % dim
+    vector = np.bincount(buckets, weights=codes, minlength=dim).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    if norm == 0.0:
+        return vector
+    return vector / norm
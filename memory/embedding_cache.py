@@ -0,0 +1,68 @@
+"""Embedding cache module for reusing embeddings of repeated texts."""
+
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """LRU cache of embeddings keyed by SHA-256 of model name and text."""
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        """Initialize an empty cache holding at most ``max_entries`` embeddings."""
+        if max_entries <= 0:
+            raise ValueError("max_entries must be a positive integer.")
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """Return the number of cached embeddings."""
+        return len(self._entries)
+
+    def get(self, model_name: str, text: str) -> Optional[np.ndarray]:
+        """Return the cached embedding for ``text`` under ``model_name``, if any."""
+        key = _cache_key(model_name, text)
+        embedding = self._entries.get(key)
+        if embedding is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return embedding
+
+    def put(self, model_name: str, text: str, embedding: np.ndarray) -> np.ndarray:
+        """Store an embedding and return the cached, read-only array."""
+        embedding = np.array(embedding, dtype=np.float32)
+        # Cached arrays are shared between callers, so guard against mutation.
+        embedding.setflags(write=False)
+        key = _cache_key(model_name, text)
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        return embedding
+
+    def clear(self) -> None:
+        """Drop all cached embeddings and reset the hit/miss counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def _cache_key(model_name: str, text: str) -> bytes:
+    """Hash model name and text so keys stay small for long inputs."""
+    digest = hashlib.sha256(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8", "surrogatepass"))
+    return digest.digest()
+
+
+# Process-wide cache shared by every embedder, so repeated experiments and
+# memory modes reuse embeddings of identical texts.
+EMBEDDING_CACHE = EmbeddingCache()
@@ -2,16 +2,31 @@
 
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, Iterable, List, NamedTuple
 
 from memory.context_memory import ContextMemory
 from memory.profile_memory import ProfileMemory
 from memory.retrieval_memory import RetrievalMemory
 
 
+class Memories(NamedTuple):
+    """Memories collected for one query."""
+
+    context: Iterable[Dict[str, str]]
+    retrieval: List[str]
+    profile: str
+
+
 class MemoryRouter:
     """Combine context, retrieval, and profile memories for a query."""
 
+    __slots__ = (
+        "_context_memory",
+        "_retrieval_memory",
+        "_profile_memory",
+        "_retrieval_k",
+    )
+
     def __init__(
         self,
         context_memory: ContextMemory,
@@ -25,9 +40,9 @@ class MemoryRouter:
         self._profile_memory = profile_memory
         self._retrieval_k = retrieval_k
 
-    def collect_memories(self, query: str) -> Dict[str, List[str] | str | list[dict]]:
+    def collect_memories(self, query: str) -> Memories:
         """Collect memories for a query in a deterministic structure."""
         context = self._context_memory.get_context()
         retrieval = self._retrieval_memory.retrieve(query, self._retrieval_k)
         profile = self._profile_memory.get_profile_prompt()
-        return {"context": context, "retrieval": retrieval, "profile": profile}
+        return Memories(context, retrieval, profile)
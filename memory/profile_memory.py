@@ -2,25 +2,61 @@
 
 from __future__ import annotations
 
-from typing import Dict
+from functools import lru_cache
+from typing import Dict, Tuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Keyword rules per profile field, highest priority first. The first rule
+# with any keyword present in the lowered text decides the field's value.
+_PROFILE_RULES: Dict[str, Tuple[Tuple[Tuple[str, ...], str], ...]] = {
+    "preference": (
+        (("i don't like", "i do not like", "i dislike"), "avoid what the user dislikes"),
+        (("i like",), "follow what the user likes"),
+        (("i prefer", "my preference is"), "follow the user's stated preference"),
+    ),
+    "style": (
+        (("formal",), "formal"),
+        (("casual", "informal"), "casual"),
+        (("concise", "brief"), "concise"),
+        (("detailed", "thorough"), "detailed"),
+    ),
+}
+
+
+def _build_automaton():
+    """Compile every profile keyword into one Aho-Corasick automaton."""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for field, rules in _PROFILE_RULES.items():
+        for priority, (keywords, value) in enumerate(rules):
+            for keyword in keywords:
+                automaton.add_word(keyword, (field, priority, value))
+    automaton.make_automaton()
+    return automaton
+
+
+_AUTOMATON = _build_automaton()
 
 
 class ProfileMemory:
     """Structured key-value store for lightweight user profile signals."""
 
+    __slots__ = ("_profile",)
+
     def __init__(self) -> None:
         """Initialize profile with predefined keys."""
         self._profile: Dict[str, str] = {"preference": "", "style": ""}
 
     def update_from_text(self, text: str) -> None:
         """Update profile fields using simple rule-based heuristics."""
-        lowered = text.lower()
-
-        preference = self._extract_preference(lowered)
+        preference, style = _classify(text)
         if preference:
             self._profile["preference"] = preference
-
-        style = self._extract_style(lowered)
         if style:
             self._profile["style"] = style
 
@@ -33,24 +69,33 @@ class ProfileMemory:
             lines.append(f"User style: {self._profile['style']}.")
         return "\n".join(lines)
 
-    def _extract_preference(self, lowered: str) -> str:
-        """Extract preference signals from text."""
-        if "i don't like" in lowered or "i do not like" in lowered or "i dislike" in lowered:
-            return "avoid what the user dislikes"
-        if "i like" in lowered:
-            return "follow what the user likes"
-        if "i prefer" in lowered or "my preference is" in lowered:
-            return "follow the user's stated preference"
-        return ""
-
-    def _extract_style(self, lowered: str) -> str:
-        """Extract style signals from text."""
-        if "formal" in lowered:
-            return "formal"
-        if "casual" in lowered or "informal" in lowered:
-            return "casual"
-        if "concise" in lowered or "brief" in lowered:
-            return "concise"
-        if "detailed" in lowered or "thorough" in lowered:
-            return "detailed"
-        return ""
+
+@lru_cache(maxsize=512)
+def _classify(text: str) -> Tuple[str, str]:
+    """Return (preference, style) signals for text; repeated texts hit the cache."""
+    signals = _extract_signals(text.lower())
+    return signals.get("preference", ""), signals.get("style", "")
+
+
+def _extract_signals(lowered: str) -> Dict[str, str]:
+    """Extract the highest-priority value per profile field from text."""
+    if _AUTOMATON is None:
+        return _scan_rules(lowered)
+    # One linear pass finds every keyword; keep the best rule per field.
+    best: Dict[str, Tuple[int, str]] = {}
+    for _, (field, priority, value) in _AUTOMATON.iter(lowered):
+        current = best.get(field)
+        if current is None or priority < current[0]:
+            best[field] = (priority, value)
+    return {field: value for field, (_, value) in best.items()}
+
+
+def _scan_rules(lowered: str) -> Dict[str, str]:
+    """Fallback keyword matching with substring checks when pyahocorasick is absent."""
+    signals: Dict[str, str] = {}
+    for field, rules in _PROFILE_RULES.items():
+        for keywords, value in rules:
+            if any(keyword in lowered for keyword in keywords):
+                signals[field] = value
+                break
+    return signals
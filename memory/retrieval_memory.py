@@ -2,76 +2,100 @@
 
 from __future__ import annotations
 
-import math
-from typing import List, Optional
+from typing import List, Optional, Set
 
-try:
-    from sentence_transformers import SentenceTransformer
-except ImportError:
-    SentenceTransformer = None
+from memory.embedder import Embedder
+from memory.vector_index import VectorIndex
 
 
 class RetrievalMemory:
     """Store text memories and retrieve them using cosine similarity."""
 
-    def __init__(self) -> None:
-        """Initialize in-memory storage and optional embedding model."""
+    __slots__ = (
+        "_texts",
+        "_pending",
+        "_index",
+        "_embedder",
+        "_near_duplicate_threshold",
+        "_seen",
+    )
+
+    def __init__(
+        self,
+        initial_capacity: int = 64,
+        use_hnsw: bool = True,
+        embedder: Optional[Embedder] = None,
+        quantize: bool = False,
+        near_duplicate_threshold: Optional[float] = None,
+    ) -> None:
+        """
+        Initialize in-memory storage and optional embedding model.
+
+        Args:
+            initial_capacity: Embedding rows reserved before the first resize.
+            use_hnsw: Search with an HNSW index when hnswlib is installed,
+                otherwise fall back to an exact NumPy scan.
+            embedder: Embedder to share with other components; a new one is
+                loaded when omitted.
+            quantize: Store embeddings as int8 in the NumPy scan backend.
+                Worth it for large stores; small stores keep float32 accuracy.
+            near_duplicate_threshold: If set, skip memories whose cosine
+                similarity to an already stored memory reaches this value
+                (e.g. 0.98). Exact duplicates are always skipped.
+        """
         self._texts: List[str] = []
-        self._embeddings: List[List[float]] = []
-        self._model: Optional[SentenceTransformer] = None
-        if SentenceTransformer is not None:
-            self._model = SentenceTransformer("all-MiniLM-L6-v2")
+        # Memories queued by add_memory, embedded together on the next flush.
+        self._pending: List[str] = []
+        self._index = VectorIndex(
+            initial_capacity=initial_capacity,
+            use_hnsw=use_hnsw,
+            quantize=quantize,
+        )
+        self._embedder = embedder if embedder is not None else Embedder()
+        self._near_duplicate_threshold = near_duplicate_threshold
+        # Hashes of every text accepted so far, indexed or still pending.
+        self._seen: Set[int] = set()
 
     def add_memory(self, text: str) -> None:
-        """Add a text memory and its embedding to storage."""
-        embedding = self._embed_text(text)
-        self._texts.append(text)
-        self._embeddings.append(embedding)
+        """Queue a text memory; it is embedded with the next batch flush."""
+        text_hash = hash(text)
+        if text_hash in self._seen:
+            return
+        self._seen.add(text_hash)
+        self._pending.append(text)
+
+    def add_memories(self, texts: List[str]) -> None:
+        """Add several text memories, embedding them in a single batch."""
+        for text in texts:
+            self.add_memory(text)
+        self.flush()
+
+    def flush(self) -> None:
+        """Embed and index all queued memories in one batch."""
+        if not self._pending:
+            return
+        texts = self._pending
+        self._pending = []
+        embeddings = self._embedder.embed_batch(texts)
+        if self._near_duplicate_threshold is None:
+            # Index row ids follow insertion order, so self._texts stays parallel.
+            self._index.add(embeddings)
+            self._texts.extend(texts)
+            return
+        # Insert one at a time so later rows are also checked against earlier
+        # rows of the same batch.
+        for text, embedding in zip(texts, embeddings):
+            _, scores = self._index.search(embedding, 1)
+            if scores.size and scores[0] >= self._near_duplicate_threshold:
+                continue
+            self._index.add(embedding)
+            self._texts.append(text)
 
     def retrieve(self, query: str, k: int) -> List[str]:
         """Retrieve top-k most similar memories for a query."""
+        self.flush()
         if k <= 0 or not self._texts:
             return []
-        query_embedding = self._embed_text(query)
-        scored = []
-        for text, emb in zip(self._texts, self._embeddings):
-            similarity = _cosine_similarity(query_embedding, emb)
-            scored.append((similarity, text))
-        scored.sort(key=lambda item: item[0], reverse=True)
-        return [text for _, text in scored[:k]]
-
-    def _embed_text(self, text: str) -> List[float]:
-        """Embed text using sentence-transformers or a simple fallback."""
-        if self._model is not None:
-            return self._model.encode([text])[0].tolist()
-        return _mock_embedding(text)
-
-
-def _mock_embedding(text: str, dim: int = 64) -> List[float]:
-    """Create a deterministic mock embedding from character codes."""
-    vector = [0.0] * dim
-    for idx, char in enumerate(text):
-        bucket = idx % dim
-        vector[bucket] += float(ord(char))
-    return _normalize(vector)
-
-
-def _normalize(vector: List[float]) -> List[float]:
-    """Normalize a vector to unit length."""
-    norm = math.sqrt(sum(value * value for value in vector))
-    if norm == 0.0:
-        return vector
-    return [value / norm for value in vector]
-
-
-def _cosine_similarity(a: List[float], b: List[float]) -> float:
-    """Compute cosine similarity between two vectors."""
-    if not a or not b:
-        return 0.0
-    length = min(len(a), len(b))
-    dot = sum(a[i] * b[i] for i in range(length))
-    norm_a = math.sqrt(sum(a[i] * a[i] for i in range(length)))
-    norm_b = math.sqrt(sum(b[i] * b[i] for i in range(length)))
-    if norm_a == 0.0 or norm_b == 0.0:
-        return 0.0
-    return dot / (norm_a * norm_b)
+        query_embedding = self._embedder.embed(query)
+        rows, _ = self._index.search(query_embedding, k)
+        return [self._texts[row] for row in rows]
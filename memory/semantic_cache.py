@@ -0,0 +1,192 @@
+"""Semantic cache module for reusing LLM responses to similar prompts."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from memory.embedder import Embedder
+from memory.vector_index import VectorIndex
+
+# Nearest rows inspected per semantic lookup, so rows cached for other
+# models do not hide a match for the requested one.
+_SEMANTIC_CANDIDATES = 8
+
+
+class SemanticCache:
+    """
+    Cache LLM responses by exact prompt and by query embedding similarity.
+
+    Exact hits require the same model and message list. Semantic hits only
+    compare the final user message, so they ignore earlier context; use a
+    high ``threshold`` when conversation history matters. Semantic matching
+    is disabled with the mock embedder, whose vectors are too alike for any
+    threshold to separate unrelated queries.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        threshold: float = 0.95,
+        max_entries: int = 1024,
+    ) -> None:
+        """
+        Initialize an empty cache.
+
+        Args:
+            embedder: Embedder for user queries; a new one is loaded when omitted.
+            threshold: Minimum cosine similarity for a semantic hit.
+            max_entries: Maximum number of responses kept per lookup path.
+        """
+        if max_entries <= 1:
+            raise ValueError("max_entries must be an integer greater than 1.")
+        self._embedder = embedder if embedder is not None else Embedder()
+        self._threshold = threshold
+        self._semantic = not self._embedder.is_mock
+        self._max_entries = max_entries
+        self._exact: "OrderedDict[bytes, str]" = OrderedDict()
+        self._index = VectorIndex()
+        # Parallel to index rows: embeddings (kept to rebuild on eviction)
+        # and (model, response) pairs.
+        self._embeddings: List[np.ndarray] = []
+        self._entries: List[Tuple[str, str]] = []
+        # Requests currently being fetched by aresolve, keyed like self._exact.
+        self._inflight: Dict[bytes, "asyncio.Future[str]"] = {}
+        self.exact_hits = 0
+        self.inflight_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def lookup(self, model: str, messages: List[Dict[str, Any]]) -> Optional[str]:
+        """Return a cached response for the prompt, or None on a miss."""
+        return self._lookup(_exact_key(model, messages), model, messages)
+
+    def store(self, model: str, messages: List[Dict[str, Any]], response: str) -> None:
+        """Cache a response under both the exact prompt and its query embedding."""
+        self._store(_exact_key(model, messages), model, messages, response)
+
+    async def aresolve(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        fetch: Callable[[], Awaitable[str]],
+    ) -> str:
+        """
+        Return a cached response, or fetch and cache one.
+
+        Identical requests that arrive while a fetch is in flight await that
+        fetch instead of issuing their own, so concurrent repeats share calls.
+        Exceptions from ``fetch`` propagate to every waiter; empty responses
+        are returned but not cached.
+        """
+        key = _exact_key(model, messages)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.inflight_hits += 1
+            # Shield so a cancelled waiter does not cancel the shared fetch.
+            return await asyncio.shield(pending)
+
+        response = self._lookup(key, model, messages)
+        if response is not None:
+            return response
+
+        future: "asyncio.Future[str]" = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await fetch()
+        except BaseException as exc:
+            if isinstance(exc, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(exc)
+                # Mark retrieved so an unawaited failure does not log a warning.
+                future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+        if response:
+            self._store(key, model, messages, response)
+        future.set_result(response)
+        return response
+
+    def _lookup(
+        self,
+        key: bytes,
+        model: str,
+        messages: List[Dict[str, Any]],
+    ) -> Optional[str]:
+        """Look up by exact key, then by query similarity."""
+        response = self._exact.get(key)
+        if response is not None:
+            self._exact.move_to_end(key)
+            self.exact_hits += 1
+            return response
+
+        query = _last_user_text(messages) if self._semantic else ""
+        if query and len(self._index):
+            rows, scores = self._index.search(
+                self._embedder.embed(query),
+                _SEMANTIC_CANDIDATES,
+            )
+            for row, score in zip(rows, scores):
+                if score < self._threshold:
+                    break
+                cached_model, response = self._entries[row]
+                if cached_model == model:
+                    self.semantic_hits += 1
+                    return response
+
+        self.misses += 1
+        return None
+
+    def _store(
+        self,
+        key: bytes,
+        model: str,
+        messages: List[Dict[str, Any]],
+        response: str,
+    ) -> None:
+        """Insert a response under its exact key and query embedding."""
+        self._exact[key] = response
+        while len(self._exact) > self._max_entries:
+            self._exact.popitem(last=False)
+
+        query = _last_user_text(messages) if self._semantic else ""
+        if not query:
+            return
+        embedding = self._embedder.embed(query)
+        self._index.add(embedding)
+        self._embeddings.append(embedding)
+        self._entries.append((model, response))
+        if len(self._entries) > self._max_entries:
+            self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        """Drop the older half of semantic entries and rebuild the index."""
+        keep = self._max_entries // 2
+        self._embeddings = self._embeddings[-keep:]
+        self._entries = self._entries[-keep:]
+        self._index = VectorIndex()
+        self._index.add(np.vstack(self._embeddings))
+
+
+def _exact_key(model: str, messages: List[Dict[str, Any]]) -> bytes:
+    """Hash the model and message list into an exact-match key."""
+    payload = json.dumps(messages, sort_keys=True, ensure_ascii=False)
+    digest = hashlib.sha256(model.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(payload.encode("utf-8", "surrogatepass"))
+    return digest.digest()
+
+
+def _last_user_text(messages: List[Dict[str, Any]]) -> str:
+    """Return the content of the final user message, if any."""
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return str(message.get("content") or "")
+    return ""
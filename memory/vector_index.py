@@ -0,0 +1,186 @@
+"""Vector index module for top-k cosine search over unit-length embeddings."""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+# Symmetric int8 scale for unit-length vectors, whose components lie in [-1, 1].
+_INT8_SCALE = 127.0
+
+
+def _int8_dot_scores(matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Dot each int8 row with an int8 query, accumulating in int32."""
+    rows, dim = matrix.shape
+    scores = np.empty(rows, dtype=np.float32)
+    for row in range(rows):
+        acc = np.int32(0)
+        for col in range(dim):
+            acc += np.int32(matrix[row, col]) * np.int32(query[col])
+        scores[row] = acc
+    return scores
+
+
+@lru_cache(maxsize=None)
+def _int8_kernel() -> Optional[Callable[[np.ndarray, np.ndarray], np.ndarray]]:
+    """JIT-compile the int8 kernel on first use; None when numba is missing."""
+    # numba is optional and slow to import, so only quantized searches pay for it.
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+    return njit(fastmath=True, cache=True)(_int8_dot_scores)
+
+
+class VectorIndex:
+    """Top-k cosine search backed by HNSW when available, else a NumPy scan."""
+
+    def __init__(
+        self,
+        initial_capacity: int = 64,
+        use_hnsw: bool = True,
+        hnsw_m: int = 16,
+        hnsw_ef_construction: int = 200,
+        hnsw_ef_search: int = 50,
+        quantize: bool = False,
+    ) -> None:
+        """
+        Initialize an empty index.
+
+        Args:
+            initial_capacity: Rows reserved before the first resize.
+            use_hnsw: Use an hnswlib graph index if hnswlib is installed.
+            hnsw_m: HNSW graph out-degree.
+            hnsw_ef_construction: HNSW candidate list size at insert time.
+            hnsw_ef_search: HNSW candidate list size at query time.
+            quantize: Store rows as symmetric int8 (scale 127) in the NumPy
+                scan backend, cutting memory 4x at a small accuracy cost.
+                hnswlib only stores float32, so this disables HNSW.
+                Scans use a numba kernel when numba is installed.
+        """
+        if initial_capacity <= 0:
+            raise ValueError("initial_capacity must be a positive integer.")
+        self._initial_capacity = initial_capacity
+        self._quantize = quantize
+        self._use_hnsw = use_hnsw and not quantize and hnswlib is not None
+        self._hnsw_m = hnsw_m
+        self._hnsw_ef_construction = hnsw_ef_construction
+        self._hnsw_ef_search = hnsw_ef_search
+        self._count = 0
+        self._dim: Optional[int] = None
+        # Exactly one backend is allocated on the first insert, once the
+        # embedding dimension is known.
+        self._hnsw = None
+        # Row-major (capacity, dim) buffer of unit-length rows, float32 or
+        # int8 when quantized; rows [0, self._count) are valid. Doubled on
+        # overflow.
+        self._matrix: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        """Return the number of stored vectors."""
+        return self._count
+
+    def add(self, vectors: np.ndarray) -> None:
+        """Append unit-length vectors of shape (n, dim); row ids follow insertion order."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        if vectors.shape[0] == 0:
+            return
+        self._reserve(self._count + vectors.shape[0], vectors.shape[1])
+        start = self._count
+        if self._hnsw is not None:
+            self._hnsw.add_items(vectors, ids=np.arange(start, start + vectors.shape[0]))
+        else:
+            self._matrix[start : start + vectors.shape[0]] = self._encode(vectors)
+        self._count += vectors.shape[0]
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (row ids, cosine scores) of the top-k rows, best first."""
+        k = min(k, self._count)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        query = np.asarray(query, dtype=np.float32)
+        if self._hnsw is not None:
+            self._hnsw.set_ef(max(self._hnsw_ef_search, k))
+            labels, distances = self._hnsw.knn_query(query, k=k)
+            # hnswlib's cosine space reports distance as 1 - similarity.
+            return labels[0].astype(np.int64), 1.0 - distances[0]
+
+        scores = self._scores(query)
+        if k < self._count:
+            top = np.argpartition(-scores, kth=k - 1)[:k]
+        else:
+            top = np.arange(self._count)
+        # Stable sort keeps insertion order among ties.
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return top, scores[top]
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Convert unit-length float rows to the storage dtype."""
+        if not self._quantize:
+            return vectors
+        return np.round(np.clip(vectors, -1.0, 1.0) * _INT8_SCALE).astype(np.int8)
+
+    def _scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the query against every stored row."""
+        # Rows are pre-normalized, so the dot product is the cosine similarity.
+        if not self._quantize:
+            return self._matrix[: self._count] @ query
+        # int8 x int8 products summed over 384 dims overflow int16, so
+        # accumulate in int32 and rescale back to [-1, 1].
+        query_q = self._encode(query)
+        kernel = _int8_kernel()
+        if kernel is not None:
+            # The JIT kernel reads int8 rows directly, with no int32 copy.
+            scores = kernel(self._matrix[: self._count], query_q)
+        else:
+            matrix = self._matrix[: self._count].astype(np.int32)
+            scores = (matrix @ query_q.astype(np.int32)).astype(np.float32)
+        return scores * (1.0 / _INT8_SCALE**2)
+
+    def _reserve(self, rows: int, dim: int) -> None:
+        """Allocate or grow the active backend to hold at least ``rows`` rows."""
+        if self._dim is None:
+            self._dim = dim
+            capacity = max(self._initial_capacity, rows)
+            if self._use_hnsw:
+                self._hnsw = hnswlib.Index(space="cosine", dim=dim)
+                self._hnsw.init_index(
+                    max_elements=capacity,
+                    M=self._hnsw_m,
+                    ef_construction=self._hnsw_ef_construction,
+                )
+            else:
+                self._matrix = np.zeros((capacity, dim), dtype=self._dtype())
+            return
+        if dim != self._dim:
+            raise ValueError(
+                f"Embedding dimension mismatch: expected {self._dim}, got {dim}."
+            )
+        capacity = (
+            self._hnsw.get_max_elements()
+            if self._hnsw is not None
+            else self._matrix.shape[0]
+        )
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        if self._hnsw is not None:
+            self._hnsw.resize_index(capacity)
+        else:
+            grown = np.zeros((capacity, dim), dtype=self._dtype())
+            grown[: self._count] = self._matrix[: self._count]
+            self._matrix = grown
+
+    def _dtype(self) -> type:
+        """Return the NumPy dtype of the scan backend's storage."""
+        return np.int8 if self._quantize else np.float32
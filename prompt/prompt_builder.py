@@ -2,41 +2,146 @@
 
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+_MessageKey = Tuple[str, str]
+
+
+class _PooledDict(dict):
+    """Query message dict recycled by PromptBuilder; ``leased`` while handed out."""
+
+    __slots__ = ("leased",)
+
+
+class _PooledList(list):
+    """Message list recycled by PromptBuilder; ``leased`` while handed out."""
+
+    __slots__ = ("leased",)
 
 
 class PromptBuilder:
     """Build chat messages from memories and current user query."""
 
+    def __init__(self, static_system: str = "") -> None:
+        """
+        Initialize the builder.
+
+        Args:
+            static_system: System prompt that never changes between turns. It
+                leads every message list so provider prompt caches can reuse it.
+        """
+        self._static_messages: List[Dict[str, str]] = []
+        if static_system:
+            self._static_messages.append({"role": "system", "content": static_system})
+        # Memoized prefix parts, rebuilt only when their inputs change.
+        self._context_key: Optional[Tuple[_MessageKey, ...]] = None
+        self._context_messages: List[Dict[str, str]] = []
+        self._dynamic_key: Optional[Tuple[str, Tuple[str, ...]]] = None
+        self._dynamic_messages: List[Dict[str, str]] = []
+        self._prefix: List[Dict[str, str]] = list(self._static_messages)
+        # Recycled per-turn containers; see release().
+        self._dict_pool: List[_PooledDict] = []
+        self._list_pool: List[_PooledList] = []
+
     def build_messages(
         self,
-        context_memories: List[Dict[str, str]],
+        context_memories: Iterable[Dict[str, str]],
         retrieved_memories: List[str],
         profile_prompt: str,
         user_query: str,
     ) -> List[Dict[str, str]]:
-        """Construct OpenAI chat messages with profile, memories, and query."""
-        messages: List[Dict[str, str]] = []
-
-        if profile_prompt:
-            messages.append({"role": "system", "content": profile_prompt})
-
-        if retrieved_memories:
-            memories_text = "\n".join(f"- {item}" for item in retrieved_memories)
-            messages.append(
-                {
-                    "role": "system",
-                    "content": f"Relevant memories:\n{memories_text}",
-                }
+        """
+        Construct OpenAI chat messages with profile, memories, and query.
+
+        Messages are ordered from most to least stable: static system prompt,
+        context turns, then one system message with the per-turn profile and
+        retrieved memories, and finally the query. Provider prompt caching
+        matches on prefixes, so volatile content goes last.
+
+        The returned list and its final user message are owned by the caller
+        until passed to ``release``; prefix message dicts are shared between
+        calls and must not be mutated.
+        """
+        prefix_changed = False
+
+        context_key = tuple(_context_message_keys(context_memories))
+        if context_key != self._context_key:
+            self._context_key = context_key
+            self._context_messages = [
+                {"role": role, "content": content} for role, content in context_key
+            ]
+            prefix_changed = True
+
+        dynamic_key = (profile_prompt, tuple(retrieved_memories))
+        if dynamic_key != self._dynamic_key:
+            self._dynamic_key = dynamic_key
+            self._dynamic_messages = _dynamic_messages(profile_prompt, retrieved_memories)
+            prefix_changed = True
+
+        if prefix_changed:
+            self._prefix = (
+                self._static_messages + self._context_messages + self._dynamic_messages
             )
 
-        for turn in context_memories:
-            user_text = turn.get("user", "")
-            assistant_text = turn.get("assistant", "")
-            if user_text:
-                messages.append({"role": "user", "content": user_text})
-            if assistant_text:
-                messages.append({"role": "assistant", "content": assistant_text})
+        query_message = self._dict_pool.pop() if self._dict_pool else _PooledDict()
+        query_message["role"] = "user"
+        query_message["content"] = user_query
+        query_message.leased = True
 
-        messages.append({"role": "user", "content": user_query})
+        messages = self._list_pool.pop() if self._list_pool else _PooledList()
+        messages.leased = True
+        messages.extend(self._prefix)
+        messages.append(query_message)
         return messages
+
+    def release(self, messages: List[Dict[str, str]]) -> None:
+        """
+        Return a message list from ``build_messages`` to the pool for reuse.
+
+        Call only after the messages have been sent; the list and the query
+        dict are cleared and handed out again on a later turn. Containers the
+        builder did not create, and lists already released, are left untouched.
+        """
+        if not isinstance(messages, _PooledList) or not messages.leased:
+            return
+        messages.leased = False
+        for message in messages:
+            if isinstance(message, _PooledDict) and message.leased:
+                message.leased = False
+                message.clear()
+                self._dict_pool.append(message)
+        messages.clear()
+        self._list_pool.append(messages)
+
+
+def _context_message_keys(
+    context_memories: Iterable[Dict[str, str]],
+) -> Iterator[_MessageKey]:
+    """Flatten context turns into (role, content) pairs in one pass."""
+    for turn in context_memories:
+        if "role" in turn:
+            # Synthetic turns, such as a rolling summary, are ready-made messages.
+            yield turn["role"], turn["content"]
+            continue
+        user_text = turn.get("user", "")
+        assistant_text = turn.get("assistant", "")
+        if user_text:
+            yield "user", user_text
+        if assistant_text:
+            yield "assistant", assistant_text
+
+
+def _dynamic_messages(
+    profile_prompt: str,
+    retrieved_memories: List[str],
+) -> List[Dict[str, str]]:
+    """Build the per-turn system message holding profile and retrieved memories."""
+    dynamic_sections: List[str] = []
+    if profile_prompt:
+        dynamic_sections.append(profile_prompt)
+    if retrieved_memories:
+        memories_text = "\n".join(f"- {item}" for item in retrieved_memories)
+        dynamic_sections.append(f"Relevant memories:\n{memories_text}")
+    if not dynamic_sections:
+        return []
+    return [{"role": "system", "content": "\n\n".join(dynamic_sections)}]
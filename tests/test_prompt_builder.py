@@ -0,0 +1,59 @@
+"""Tests for PromptBuilder container pooling."""
+
+from __future__ import annotations
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from prompt.prompt_builder import PromptBuilder
+
+
+def _build(builder: PromptBuilder, query: str):
+    return builder.build_messages(
+        context_memories=[{"user": "hi", "assistant": "hello"}],
+        retrieved_memories=[],
+        profile_prompt="",
+        user_query=query,
+    )
+
+
+def test_release_ignores_lists_the_builder_did_not_create() -> None:
+    builder = PromptBuilder(static_system="You are a helpful assistant.")
+    for _ in range(2000):
+        # Leaked leases must not make unrelated lists look pooled.
+        _build(builder, "leaked")
+        foreign = [{"role": "user", "content": "keep me"}]
+        builder.release(foreign)
+        assert foreign == [{"role": "user", "content": "keep me"}]
+
+
+def test_release_recycles_query_container_but_not_prefix() -> None:
+    builder = PromptBuilder(static_system="You are a helpful assistant.")
+    first = _build(builder, "first")
+    prefix = first[:-1]
+    query_message = first[-1]
+    builder.release(first)
+
+    second = _build(builder, "second")
+    assert second is first
+    assert second[-1] is query_message
+    assert second[:-1] == prefix
+    assert second[0] == {"role": "system", "content": "You are a helpful assistant."}
+    assert second[-1] == {"role": "user", "content": "second"}
+
+
+def test_double_release_does_not_hand_out_one_list_twice() -> None:
+    builder = PromptBuilder()
+    messages = _build(builder, "q")
+    builder.release(messages)
+    builder.release(messages)
+
+    first = _build(builder, "a")
+    second = _build(builder, "b")
+    assert first is not second
+    assert first[-1]["content"] == "a"
+    assert second[-1]["content"] == "b"